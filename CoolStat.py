@@ -1,18 +1,13 @@
 import os
 from dotenv import load_dotenv
 from matplotlib.cm import ScalarMappable
-from matplotlib.colors import Normalize, to_rgba
+from matplotlib.colors import Normalize
 from matplotlib.lines import Line2D
 import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from mplsoccer import Pitch, VerticalPitch, Sbopen
-from statsbombpy import sb
-from scipy.stats import gaussian_kde
-import ast
-from sqlalchemy import create_engine
-from goal_plot import draw_goal
+from sqlalchemy import create_engine, text
 
 # Configuración de la página
 st.set_page_config(page_title="CoolStat", page_icon="logo.jpg", layout="wide")
@@ -20,42 +15,118 @@ st.set_page_config(page_title="CoolStat", page_icon="logo.jpg", layout="wide")
 # Cargar variables de entorno
 # load_dotenv()
 
-# Crear conexión a la base de datos
+# Crear conexión a la base de datos (una sola vez, reutilizando el pool entre ejecuciones)
 DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASS')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-engine = create_engine(DATABASE_URL)
 
-# Cargar datos
-@st.cache_data
+@st.cache_resource
+def get_engine():
+    return create_engine(DATABASE_URL, pool_pre_ping=True)
+
+engine = get_engine()
+
+# Cargar datos (guardados en disco para no repetir la consulta y el preprocesado tras reiniciar la app)
+@st.cache_data(persist="disk")
 def load_data():
     try:
-        eurocopa = pd.read_sql('SELECT * FROM eurocopa_datos', engine)
-        copa_america = pd.read_sql('SELECT * FROM copa_america_datos', engine)
+        eurocopa = pd.read_sql('SELECT * FROM eurocopa_datos', engine, dtype_backend="pyarrow")
+        copa_america = pd.read_sql('SELECT * FROM copa_america_datos', engine, dtype_backend="pyarrow")
+
+        # Renombrar competiciones
+        eurocopa["competition"] = eurocopa["competition"].replace("Europe - UEFA Euro", "UEFA Euro")
+        copa_america["competition"] = copa_america["competition"].replace("South America - Copa America", "Copa América")
+
+        for df in (eurocopa, copa_america):
+            # Crear nueva columna con los equipos del partido
+            df["match_teams"] = "(" + df['competition_stage'] + ") " + df["home_team"] + " " + df['home_score'].astype(str) + " - " + df['away_score'].astype(str) + " " + df["away_team"]
+
+            # Convertir a categorías las columnas de texto que se filtran por igualdad;
+            # local y visitante comparten la lista de equipos ordenada alfabéticamente
+            teams = pd.CategoricalDtype(sorted(set(df["home_team"]) | set(df["away_team"])))
+            df["home_team"] = df["home_team"].astype(teams)
+            df["away_team"] = df["away_team"].astype(teams)
+            df["competition_stage"] = df["competition_stage"].astype("category")
+
+            # Reducir los marcadores a int8
+            for column in ("home_score", "away_score"):
+                df[column] = df[column].astype("int8")
+
         return eurocopa, copa_america
     
     except Exception as e:
         st.error(f"Error loading data: {e}")
         st.stop()
 
-# Cargar alineaciones
-@st.cache_data
+# Cargar alineaciones (compartidas entre sesiones, solo lectura)
+@st.cache_resource
 def load_lineups(selected_competition):
     try:
         if selected_competition == "UEFA Euro":
-            return pd.read_sql('SELECT * FROM euro_lineups', engine)
+            lineups = pd.read_sql('SELECT * FROM euro_lineups', engine, dtype_backend="pyarrow")
         else:
-            return pd.read_sql('SELECT * FROM copa_america_lineups', engine)
+            lineups = pd.read_sql('SELECT * FROM copa_america_lineups', engine, dtype_backend="pyarrow")
+
+        # Marcar una sola vez los titulares (posición desde el minuto 00:00) y los que jugaron (posiciones distintas de "[]")
+        positions = lineups.pop("positions")
+        lineups["is_starter"] = positions.str.contains("'from': '00:00'", regex=False).astype(bool)
+        lineups["played"] = (positions.str.len() > 2).astype(bool)
+        lineups["jersey_number"] = lineups["jersey_number"].astype("int8")
+        # El equipo se compara en cada partido: como categoría se comparan códigos enteros
+        lineups["country"] = lineups["country"].astype("category")
+
+        # Ordenar por dorsal y agrupar una sola vez por partido para acceder a cada alineación sin recorrer toda la tabla
+        lineups = lineups.sort_values(by="jersey_number", kind="stable")
+        return {match_id: match_lineups for match_id, match_lineups in lineups.groupby("match_id", sort=False)}
 
     except Exception as e:
         st.error(f"Error loading lineups: {e}")
         st.stop()
 
-@st.cache_data
-def load_events(selected_competition):
+# Alineación de un equipo en el partido (ya ordenada por dorsal); las alineaciones (con "_") no se hashean
+@st.cache_resource(max_entries=128)
+def team_lineup(team, match_id, _match_lineups):
+    return _match_lineups[_match_lineups["country"] == team]
+
+# Columnas de los eventos que se usan en la aplicación
+EVENT_COLUMNS = ["match_id", "type", "team", "player", "minute", "period", "location", "pass_end_location",
+                 "pass_type", "pass_outcome", "shot_outcome", "shot_type", "shot_statsbomb_xg"]
+
+def parse_locations(locations):
+    # Convertir strings "[x, y]" a un array float32 de dos columnas (NaN si no hay ubicación)
+    coords = locations.fillna("[nan, nan]").str.strip("[]").str.split(",", n=1, expand=True)
+    return coords.to_numpy(dtype=np.float32)
+
+# Compartir una única copia de los eventos de cada partido entre sesiones (solo lectura),
+# junto con las posiciones de sus filas para que ambas se cacheen y se descarten a la vez
+@st.cache_resource(max_entries=64)
+def load_match_events(selected_competition, match_id):
     try:
+        # Filtrar por partido en Postgres (índice sobre match_id) en lugar de cargar toda la competición,
+        # en el orden de los eventos del partido para que las posiciones de las filas sean estables
         if selected_competition == "UEFA Euro":
-            return pd.read_sql('SELECT * FROM euro_all_events', engine)
+            query = text(f'SELECT {", ".join(EVENT_COLUMNS)} FROM euro_all_events WHERE match_id = :match_id ORDER BY "index"')
         else:
-            return pd.read_sql('SELECT * FROM copa_america_all_events', engine)
+            query = text(f'SELECT {", ".join(EVENT_COLUMNS)} FROM copa_america_all_events WHERE match_id = :match_id ORDER BY "index"')
+        events = pd.read_sql(query, engine, params={"match_id": int(match_id)}, dtype_backend="pyarrow")
+
+        # Separar las coordenadas una sola vez al cargar
+        location = parse_locations(events.pop("location"))
+        events["x"], events["y"] = location[:, 0], location[:, 1]
+
+        pass_end_location = parse_locations(events.pop("pass_end_location"))
+        events["pass_end_x"], events["pass_end_y"] = pass_end_location[:, 0], pass_end_location[:, 1]
+
+        # Convertir a categorías las columnas de texto que se filtran por igualdad
+        for column in ("type", "team", "player", "pass_type", "pass_outcome", "shot_outcome", "shot_type"):
+            events[column] = events[column].astype("category")
+        events["minute"] = events["minute"].astype("int16")
+        events["period"] = events["period"].astype("int8")
+        events["shot_statsbomb_xg"] = events["shot_statsbomb_xg"].astype("float32")
+
+        # Posiciones de las filas de cada (tipo, equipo) y (tipo, jugador) del partido
+        event_rows = events.groupby(["type", "team"], observed=True).indices
+        event_rows.update(events.groupby(["type", "player"], observed=True).indices)
+
+        return events, event_rows
 
     except Exception as e:
         st.error(f"Error loading events: {e}")
@@ -66,10 +137,6 @@ st.sidebar.header("🏆 Football Championships")
 
 eurocopa, copa_america = load_data()
 
-# Renombrar competiciones
-eurocopa["competition"] = eurocopa["competition"].replace("Europe - UEFA Euro", "UEFA Euro")
-copa_america["competition"] = copa_america["competition"].replace("South America - Copa America", "Copa América")
-    
 # Lista de competiciones disponibles
 competition_list = (
     eurocopa["competition"].unique().tolist() + copa_america["competition"].unique().tolist()
@@ -79,14 +146,10 @@ selected_competition = st.sidebar.selectbox("Select a competition", competition_
 # Selección de equipos según la competición elegida
 df_selected = eurocopa if selected_competition in eurocopa["competition"].unique() else copa_america
     
-# Lista de equipos ordenada alfabéticamente
-team_list = sorted(set(df_selected["home_team"].unique()) | set(df_selected["away_team"].unique()))
+# Lista de equipos ordenada alfabéticamente (categorías ya ordenadas al cargar)
+team_list = df_selected["home_team"].cat.categories.tolist()
 selected_team = st.sidebar.selectbox("Select a team", team_list)
 
-# Crear nueva columna con los equipos del partido
-eurocopa["match_teams"] = "(" + eurocopa['competition_stage'] + ") " + eurocopa["home_team"] + " " + eurocopa['home_score'].astype(str) + " - " + eurocopa['away_score'].astype(str) + " " + eurocopa["away_team"]
-copa_america["match_teams"] = "(" + copa_america['competition_stage'] + ") " + copa_america["home_team"] + " " + copa_america['home_score'].astype(str) + " - " + copa_america['away_score'].astype(str) + " " + copa_america["away_team"]
-
 # Filtrar partidos donde el equipo haya jugado
 team_matches = df_selected.loc[(df_selected["home_team"] == selected_team) | (df_selected["away_team"] == selected_team)].sort_values(by="match_date", ascending=True)
 
@@ -94,45 +157,39 @@ team_matches = df_selected.loc[(df_selected["home_team"] == selected_team) | (df
 df_selected_match = st.sidebar.selectbox("Select a match", team_matches["match_teams"].unique())
 match_details = team_matches[team_matches["match_teams"] == df_selected_match]
 
-def load_passes(match_id):
-    # Obtener los eventos del partido seleccionado
-    events = load_events(selected_competition)
-    passes = events[(events["type"] == "Pass") & (events["match_id"] == match_id)].copy()
-    
-    # Convertir strings a listas (más seguro con ast.literal_eval)
-    passes['location'] = passes['location'].apply(lambda loc: ast.literal_eval(loc) if isinstance(loc, str) else loc)
-    passes['pass_end_location'] = passes['pass_end_location'].apply(lambda loc: ast.literal_eval(loc) if isinstance(loc, str) else loc)
-
-    # Filtrar valores válidos
-    passes = passes[passes['location'].notnull() & passes['pass_end_location'].notnull()]
-
-    # Separar coordenadas
-    passes[['x', 'y']] = pd.DataFrame(passes['location'].tolist(), index=passes.index)
-    passes[['pass_end_x', 'pass_end_y']] = pd.DataFrame(passes['pass_end_location'].tolist(), index=passes.index)
+# Posiciones vacías para equipos o jugadores sin eventos
+NO_ROWS = np.empty(0, dtype=np.intp)
 
-    return passes
+def select_events(match_events, event_rows, event_type, team_or_player):
+    # Obtener los eventos de un tipo de un equipo o jugador sin recorrer todo el partido
+    rows = event_rows.get((event_type, team_or_player), NO_ROWS)
+    return match_events.take(rows)
 
-@st.cache_data
-def filter_passes(player, match_id):
-    passes = load_passes(match_id)
+# match_id identifica el partido en la caché; los eventos y sus posiciones (con "_") no se hashean
+@st.cache_data(max_entries=128, show_spinner=False)
+def filter_passes(player, match_id, _match_events, _event_rows):
+    # Obtener los pases del jugador en el partido seleccionado
+    passes = select_events(_match_events, _event_rows, "Pass", player)
 
-    # Eliminar los saques de banda
-    passes = passes[passes["pass_type"] != "Throw-in"]
+    # Una sola máscara: coordenadas válidas y sin saques de banda
+    coordinates = ["x", "y", "pass_end_x", "pass_end_y"]
+    valid = passes[coordinates].notnull().all(axis=1) & (passes["pass_type"] != "Throw-in")
+    player_passes = passes.loc[valid, coordinates + ["pass_outcome"]]
 
-    # Filtrar los pases del jugador
-    player_passes = passes[passes["player"] == player]
+    # Dividir en exitosos y fallidos como arrays (x, y, pass_end_x, pass_end_y)
+    successful = player_passes["pass_outcome"].isnull().to_numpy()  # Exitosos tienen outcome "nan", fallidos "Incomplete"
+    player_coordinates = player_passes[coordinates].to_numpy().T
 
-    # Dividir en exitosos y fallidos
-    successful_passes = player_passes[player_passes["pass_outcome"].isnull()]  # Exitosos tienen outcome "nan"
-    unsuccessful_passes = player_passes[player_passes["pass_outcome"].notnull()]  # Fallidos tienen outcome "Incomplete"
-
-    return successful_passes, unsuccessful_passes
+    return player_coordinates[:, successful], player_coordinates[:, ~successful]
 
 
 @st.cache_data
-def pass_map(player, match_id):
+def pass_map(player, match_id, _match_events, _event_rows):
+    # Importar al dibujar: la pestaña por defecto (Match Report) no lo necesita
+    from mplsoccer import Pitch
+
     # Obtener los pases del jugador
-    successful_passes, unsuccessful_passes = filter_passes(player, match_id)
+    successful_passes, unsuccessful_passes = filter_passes(player, match_id, _match_events, _event_rows)
 
     # Dibujar el campo de fútbol
     pitch = Pitch(pitch_type='statsbomb', pitch_color='#22312b')
@@ -140,13 +197,11 @@ def pass_map(player, match_id):
     fig.set_facecolor('white')
 
     # Dibujar flechas para los pases exitosos
-    pitch.arrows(successful_passes["x"], successful_passes["y"],
-                 successful_passes["pass_end_x"], successful_passes["pass_end_y"],
+    pitch.arrows(*successful_passes,
                  width=3, headwidth=5, headlength=5, color="green", ax=ax, label='Successful passes')
 
     # Dibujar flechas para los pases fallidos
-    pitch.arrows(unsuccessful_passes["x"], unsuccessful_passes["y"],
-                 unsuccessful_passes["pass_end_x"], unsuccessful_passes["pass_end_y"],
+    pitch.arrows(*unsuccessful_passes,
                  width=3, headwidth=5, headlength=5, color="red", ax=ax, label='Unsuccessful passes')
 
     # Leyenda
@@ -156,61 +211,67 @@ def pass_map(player, match_id):
     ax.set_title(f"{player}'s Passes", x=0.5, y=1.075, fontsize=22, color='black')
 
     st.pyplot(fig)
+    plt.close(fig)
 
 
-@st.cache_data
-def filter_pass_network(team, match_id):
+# Descargar los eventos y alineaciones de StatsBomb una sola vez por partido (compartidos por ambos equipos)
+@st.cache_resource(max_entries=64)
+def load_statsbomb_match(match_id):
+    from mplsoccer import Sbopen
+
     parser = Sbopen()
     df, related, freeze, tactics = parser.event(match_id)  # ID del partido
+    return df, parser.lineup(match_id)
+
+@st.cache_data
+def filter_pass_network(team, match_id):
+    df, df_lineup = load_statsbomb_match(match_id)
 
     # Filtrar equipo
     df = df[df['team_name'] == team]
 
-    # Filtrar pases
-    passes = df[df['type_name'] == 'Pass']
-    passes = passes[['id','minute','player_id','player_name','x','y','end_x', 'end_y',
-                    'pass_recipient_id','pass_recipient_name','outcome_id','outcome_name']]
-
-    # Filtrar pases exitosos antes del primer cambio
-    successful = passes[passes['outcome_name'].isnull()]
-    subs = df[df['type_name'] == 'Substitution']['minute']
-    firstSub = subs.min()
-    successful = successful[successful['minute'] < firstSub]
+    # Filtrar pases exitosos antes del primer cambio (una sola máscara y una sola copia)
+    firstSub = df.loc[df['type_name'] == 'Substitution', 'minute'].min()
+    successful = df.loc[(df['type_name'] == 'Pass') & df['outcome_name'].isnull() & (df['minute'] < firstSub),
+                        ['id','minute','player_id','player_name','x','y','end_x', 'end_y',
+                         'pass_recipient_id','pass_recipient_name','outcome_id','outcome_name']]
 
     # Obtener dorsales y apodos
-    df_lineup = parser.lineup(match_id)
     jersey_data = df_lineup[['player_id', 'player_nickname', 'jersey_number']]
 
     # Añadir jersey del pasador
-    successful = pd.merge(successful, jersey_data, on='player_id')
-    successful.rename(columns={'jersey_number': 'passer'}, inplace=True)
+    successful = pd.merge(successful, jersey_data, on='player_id').rename(columns={'jersey_number': 'passer'})
 
     jersey_data = jersey_data.rename(columns={'player_id': 'pass_recipient_id'})
-    successful = pd.merge(successful, jersey_data, on='pass_recipient_id')
-    successful.rename(columns={'jersey_number': 'recipient'}, inplace=True)
+    successful = pd.merge(successful, jersey_data, on='pass_recipient_id').rename(columns={'jersey_number': 'recipient'})
 
     # Crear diccionario dorsal-nombre
     dorsal_to_name = dict(zip(successful['passer'], successful['player_nickname_x']))
 
     # Media de las ubicaciones
-    average_locations = successful.groupby('passer').agg({'x': 'mean', 'y': 'mean', 'id': 'count'})
-    average_locations.rename(columns={'id': 'count'}, inplace=True)
+    average_locations = successful.groupby('passer', sort=False).agg(x=('x', 'mean'), y=('y', 'mean'), count=('id', 'size'))
 
-    # Pases entre jugadores
-    pass_between = successful.groupby(['passer', 'recipient']).id.count().reset_index()
-    pass_between.rename(columns={'id': 'pass_count'}, inplace=True)
+    # Pases entre jugadores (solo las parejas con más de un pase)
+    pass_between = successful.groupby(['passer', 'recipient'], sort=False).size().reset_index(name='pass_count')
+    pass_between = pass_between[pass_between['pass_count'] > 1]
 
-    # Añadir ubicaciones
-    pass_between = pd.merge(pass_between, average_locations, on='passer')
-    average_locations_end = average_locations.rename_axis('recipient').reset_index()
-    pass_between = pd.merge(pass_between, average_locations_end, on='recipient', suffixes=['', '_end'])
+    # Añadir ubicaciones buscándolas por dorsal en las medias ya indexadas
+    pass_between['x'] = pass_between['passer'].map(average_locations['x'])
+    pass_between['y'] = pass_between['passer'].map(average_locations['y'])
+    pass_between['x_end'] = pass_between['recipient'].map(average_locations['x'])
+    pass_between['y_end'] = pass_between['recipient'].map(average_locations['y'])
 
-    pass_between = pass_between[pass_between['pass_count'] > 1]
+    # Descartar receptores sin ubicación media (no dieron ningún pase)
+    pass_between = pass_between[pass_between['x_end'].notna()]
 
     return pass_between, average_locations, dorsal_to_name
 
 
+@st.cache_data
 def pass_network(team, match_id):
+    # Importar al dibujar: la pestaña por defecto (Match Report) no lo necesita
+    from mplsoccer import Pitch
+
     # Obtener los pases del equipo
     pass_between, average_locations, dorsal_to_name = filter_pass_network(team, match_id)
 
@@ -225,18 +286,18 @@ def pass_network(team, match_id):
                     lw=pass_between.pass_count * 0.5,
                     color='white', zorder=1, ax=ax)
 
+    # Posiciones de los nodos en el campo, calculadas una sola vez
+    node_x = 1.2 * average_locations['x'].to_numpy()
+    node_y = 0.8 * average_locations['y'].to_numpy()
+
     # Dibujar nodos
-    pitch.scatter(1.2*average_locations.x, 0.8*average_locations.y,
+    pitch.scatter(node_x, node_y,
                     s=40*average_locations['count'].values, color='red',
                     edgecolors='black', linewidth=1, ax=ax, zorder=1)
 
-    # Añadir dorsales y nombres
-    for index, row in average_locations.iterrows():
-        x = 1.2 * row.x
-        y = 0.8 * row.y
-
-        # Dorsal
-        pitch.annotate(index, xy=(x, y), c='white', va='center',
+    # Añadir dorsales
+    for dorsal, x, y in zip(average_locations.index, node_x, node_y):
+        pitch.annotate(dorsal, xy=(x, y), c='white', va='center',
                     ha='center', fontweight='bold', size=13, ax=ax)
         
     
@@ -259,44 +320,38 @@ def pass_network(team, match_id):
     ax.set_title(f"{team}'s Average Positions and Passing Network", y=1.1, color='white', fontsize=20)
 
     st.pyplot(fig)
+    plt.close(fig)
 
 
-@st.cache_data
-def filter_heatmap(team, match_id):
-    # Obtener los eventos del partido seleccionado
-    events = load_events(selected_competition)
-
-    # Filtrar eventos del partido seleccionado
-    match_events = events[events["match_id"] == match_id]
-
+@st.cache_data(max_entries=128, show_spinner=False)
+def filter_heatmap(team, match_id, _match_events, _event_rows):
     # Filtrar pases del equipo seleccionado
-    team_passes = match_events[(match_events["type"] == "Pass") & (match_events["team"] == team)].copy()
-
-    # Convertir las ubicaciones de los pases a listas
-    team_passes['location'] = team_passes['location'].apply(lambda loc: ast.literal_eval(loc) if isinstance(loc, str) else loc)
+    team_passes = select_events(_match_events, _event_rows, "Pass", team)
 
-    # Separar las coordenadas de inicio de los pases
-    team_passes[['x', 'y']] = pd.DataFrame(team_passes['location'].tolist(), index=team_passes.index)
+    return team_passes["x"].to_numpy(), team_passes["y"].to_numpy()
 
-    return team_passes
 
+@st.cache_data
+def heatmap(team, match_id, _match_events, _event_rows):
+    # Importar al dibujar: la pestaña por defecto (Match Report) no lo necesita
+    from mplsoccer import Pitch
+    from scipy.ndimage import gaussian_filter
 
-def heatmap(team, match_id):
     # Filtrar los pases del equipo seleccionado
-    team_passes = filter_heatmap(team, match_id)
+    x, y = filter_heatmap(team, match_id, _match_events, _event_rows)
 
     # Crear el mapa de calor
     fig, ax = plt.subplots(figsize=(8, 6))
     pitch = Pitch(pitch_type='statsbomb', pitch_color='white', line_color='black')
     pitch.draw(ax=ax)
 
-    # Crear kernel density estimation para la localización de inicio del pase
-    kde = gaussian_kde([team_passes['x'], team_passes['y']])
-    xi, yi = np.mgrid[0:120:100j, 0:80:100j]
-    zi = kde(np.vstack([xi.flatten(), yi.flatten()]))
+    # Contar los inicios de pase por zona del campo y suavizar con un filtro gaussiano (en float32)
+    bin_statistic = pitch.bin_statistic(x, y, statistic='count', bins=(60, 40), normalize=True)
+    bin_statistic['statistic'] = gaussian_filter(bin_statistic['statistic'].astype(np.float32), sigma=4)
+    zi = bin_statistic['statistic']
 
     # Dibujar el mapa de calor
-    heatmap = ax.pcolormesh(xi, yi, zi.reshape(xi.shape), cmap='hot', alpha=0.6)
+    heatmap = pitch.heatmap(bin_statistic, ax=ax, cmap='hot', alpha=0.6)
 
     # Leyenda visual
     norm = Normalize(vmin=zi.min(), vmax=zi.max())
@@ -319,51 +374,38 @@ def heatmap(team, match_id):
     ax.set_ylim(-10, 90)
 
     st.pyplot(fig)
+    plt.close(fig)
 
 
-@st.cache_data
-def filter_shots(team, match_id):
-    # Obtener los eventos del partido seleccionado
-    events = load_events(selected_competition)
-
-    # Filtrar eventos del partido seleccionado
-    match_events = events[events["match_id"] == match_id]
-
+@st.cache_data(max_entries=128, show_spinner=False)
+def filter_shots(team, match_id, _match_events, _event_rows):
     # Filtrar tiros
-    shots = match_events[(match_events["type"] == "Shot") & (match_events["team"] == team)].reset_index(drop=True).copy()
+    shots = select_events(_match_events, _event_rows, "Shot", team)
 
-    # Convertir 'location' a listas
-    shots['location'] = shots['location'].apply(lambda loc: ast.literal_eval(loc) if isinstance(loc, str) else loc)
+    # Excluir los penaltis
+    shots = shots[shots["shot_type"] != "Penalty"]
 
-    return shots
+    return (shots["x"].to_numpy(), shots["y"].to_numpy(), shots["shot_statsbomb_xg"].to_numpy(),
+            (shots["shot_outcome"] == "Goal").to_numpy())
 
-def shot_map(team, match_id):
-    # Obtener los tiros del equipo
-    shots = filter_shots(team, match_id)
+@st.cache_data
+def shot_map(team, match_id, _match_events, _event_rows):
+    # Importar al dibujar: la pestaña por defecto (Match Report) no lo necesita
+    from mplsoccer import VerticalPitch
 
-    # Excluir los penaltis
-    shots = shots[shots["shot_type"] != "Penalty"]
+    # Obtener los tiros del equipo
+    shots_x, shots_y, shots_xg, shots_is_goal = filter_shots(team, match_id, _match_events, _event_rows)
 
     # Crear el campo de fútbol vertical
     pitch = VerticalPitch(pitch_type='statsbomb', pitch_color='grass', half=True, goal_type='box', line_color='#d8d8d8')
     fig, ax = pitch.draw(figsize=(10, 10), constrained_layout=True, tight_layout=False)
 
-    # Dibujar los tiros
-    for shot in shots.to_dict(orient='records'):
-        is_goal = shot['shot_outcome'] == 'Goal'
-
-        pitch.scatter(
-            x=shot['location'][0],
-            y=shot['location'][1],
-            ax=ax,
-            s=1500 * shot['shot_statsbomb_xg'],  # Tamaño proporcional al xG
-            color='green' if is_goal else 'red',  # Verde si es gol, rojo si fallo
-            edgecolors='black',
-            alpha=1 if is_goal else 0.6,  # Opacidad mayor si es gol
-            marker='o' if is_goal else 'x',  # Marcador diferente para goles y no goles
-            linewidth=2 if not is_goal else 1,
-            zorder=1 if is_goal else 1.5  # Z-order para superposición
-        )
+    # Dibujar los goles (verde) y los fallos (rojo), con tamaño proporcional al xG
+    misses = ~shots_is_goal
+    pitch.scatter(shots_x[shots_is_goal], shots_y[shots_is_goal], ax=ax, s=1500 * shots_xg[shots_is_goal],
+                  color='green', edgecolors='black', alpha=1, marker='o', linewidth=1, zorder=1)
+    pitch.scatter(shots_x[misses], shots_y[misses], ax=ax, s=1500 * shots_xg[misses],
+                  color='red', edgecolors='black', alpha=0.6, marker='x', linewidth=2, zorder=1.5)
 
     # Leyenda izquierda
     legend1_elements = [
@@ -388,6 +430,36 @@ def shot_map(team, match_id):
     
     # Mostrar el gráfico
     st.pyplot(fig)
+    plt.close(fig)
+
+
+def restore_selection(key, options):
+    # Con las pestañas perezosas, los widgets de una pestaña cerrada pierden su estado:
+    # recuperar la última selección desde una copia que no pertenece a ningún widget
+    if st.session_state.get(key) not in options:
+        saved = st.session_state.get(f"saved_{key}")
+        if saved in options:
+            st.session_state[key] = saved
+        else:
+            st.session_state.pop(key, None)
+
+def save_selection(key):
+    # Guardar la selección actual del widget para restaurarla al volver a la pestaña
+    st.session_state[f"saved_{key}"] = st.session_state[key]
+
+def goal_minute(minute):
+    # Sumar 1 al minuto si fue en los primeros segundos
+    return minute + 1 if minute == 0 else minute
+
+def goals_text(goals, own_goals, missed_penalties):
+    # Goles (marcando los de penalti), goles en propia puerta del rival y penaltis fallados de un equipo
+    lines = [f"⚽ <b>{goal.player}{' (p)' if goal.shot_type == 'Penalty' else ''}</b> - {goal_minute(goal.minute)}'<br>"
+             for goal in goals.itertuples()]
+    lines += [f"🛑 <b>{own_goal.player}</b> (Own Goal) - {goal_minute(own_goal.minute)}'<br>"
+              for own_goal in own_goals.itertuples()]
+    lines += [f"❌ <b>{penalty.player}</b> (Missed Penalty) - {goal_minute(penalty.minute)}'<br>"
+              for penalty in missed_penalties.itertuples()]
+    return "".join(lines)
 
 
 def main():
@@ -397,302 +469,261 @@ def main():
 
     st.subheader(f"📊 {selected_competition} 2024 Statistics")
 
+    # Datos del partido seleccionado, extraídos una sola vez
+    match_info = match_details.iloc[0].to_dict()
+
     # Obtener los eventos del partido seleccionado
-    events = load_events(selected_competition)
+    match_id = match_info["match_id"]
+    match_events, match_event_rows = load_match_events(selected_competition, match_id)
 
-    # Filtrar eventos del partido seleccionado
-    match_id = match_details["match_id"].values[0]
-    match_events = events[events["match_id"] == match_id]
+    # Obtener los nombres de los equipos en el partido
+    home_team = match_info["home_team"]
+    away_team = match_info["away_team"]
 
+    # Alineaciones del partido separadas por equipo (se usan en las pestañas de alineaciones y de mapa de pases)
+    match_lineups = load_lineups(selected_competition)[match_id]
+    home_team_lineup = team_lineup(home_team, match_id, match_lineups)
+    away_team_lineup = team_lineup(away_team, match_id, match_lineups)
+
+    # Solo se ejecuta el contenido de la pestaña seleccionada (al cambiar de pestaña se vuelve a ejecutar la app)
     match_report, data_tab, heatmap_tab, pass_map_tab, pass_network_tab, shot_map_tab = st.tabs(['Match Report', 
                                                                                                     'Lineups',
                                                                                                     'Heatmap',
                                                                                                     'Pass Map',
                                                                                                     'Pass Network',
-                                                                                                    'Shot Map'])
+                                                                                                    'Shot Map'],
+                                                                                                   on_change="rerun", key="match_tab")
 
     # Primera pestaña
-    with match_report:
-        st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
-        
-        # Resultado y goleadores
-        goals = match_events[match_events["shot_outcome"] == "Goal"]  # Filtrar eventos de gol
-        own_goals = match_events[match_events["type"] == "Own Goal Against"] # Filtrar eventos de gol en propia puerta
-        missed_penalties = match_events[(match_events["shot_type"] == "Penalty")
-                                        & ((match_events["shot_outcome"].isin(["Saved", "Post"])))] # Filtrar penaltis fallados
-
-        # Filtrar goles por equipo
-        home_goals = goals[goals["team"] == match_details.iloc[0]["home_team"]]
-        away_goals = goals[goals["team"] == match_details.iloc[0]["away_team"]]
-
-        # Filtrar goles en propia puerta
-        home_own_goals = own_goals[own_goals["team"] == match_details.iloc[0]["home_team"]]
-        away_own_goals = own_goals[own_goals["team"] == match_details.iloc[0]["away_team"]]
-
-        # Filtrar penaltis fallados
-        home_missed_penalties = missed_penalties[missed_penalties["team"] == match_details.iloc[0]["home_team"]]
-        away_missed_penalties = missed_penalties[missed_penalties["team"] == match_details.iloc[0]["away_team"]]
-
-        # Filtrar goles en la tanda de penaltis
-        shootout_goals = match_events[(match_events["shot_outcome"] == "Goal") & (match_events["period"] == 5)]
-        home_shootout_goals = shootout_goals[shootout_goals["team"] == match_details.iloc[0]["home_team"]].shape[0]
-        away_shootout_goals = shootout_goals[shootout_goals["team"] == match_details.iloc[0]["away_team"]].shape[0]
-
-
-        col1, col2, col3, col4, col5, col6 = st.columns([1, 0.9, 0.4, 0.4, 0.8, 0.8])
-        with col1:
-            # Local
-            st.markdown(f"<h4 style='text-align: center;'>{match_details.iloc[0]['home_team']}</h4>", unsafe_allow_html=True)
-        
-        with col2:
-            st.image(f"img/{match_details.iloc[0]['home_team']}.jpg", width=80)
+    if match_report.open:
+        with match_report:
+            st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
             
-            # Construir texto para los goles del equipo local
-            home_goals_text = ""
-            if home_goals.empty and away_own_goals.empty and home_missed_penalties.empty:
-                home_goals_text = ""
-            else:
-                for _, goal in home_goals.iterrows():
-                    player = goal["player"]
-                    minute = goal["minute"] + 1 if goal["minute"] == 0 else goal["minute"] # Sumar 1 al minuto si fue en los primeros segundos
-                    is_penalty = goal["shot_type"] == "Penalty"  # Verificar si el gol fue de penalti
-                    penalty_marker = " (p)" if is_penalty else ""
-                    home_goals_text += f"⚽ <b>{player}{penalty_marker}</b> - {minute}'<br>"
-
-                for _, own_goal in away_own_goals.iterrows():
-                    player = own_goal["player"]
-                    minute = own_goal["minute"] + 1 if own_goal["minute"] == 0 else own_goal["minute"] # Sumar 1 al minuto si fue en los primeros segundos
-                    home_goals_text += f"🛑 <b>{player}</b> (Own Goal) - {minute}'<br>"
-
-                for _, penalty in home_missed_penalties.iterrows():
-                    player = penalty["player"]
-                    minute = penalty["minute"] + 1 if penalty["minute"] == 0 else penalty["minute"] # Sumar 1 al minuto si fue en los primeros segundos
-                    home_goals_text += f"❌ <b>{player}</b> (Missed Penalty) - {minute}'<br>"
-
-            # Consolidar todo en un único st.markdown
-            st.markdown(f"""
-                <div style="text-align: center;">
-                    <div style="margin-top: 30px;"></div>
-                    <div style="text-align: left;">
-                        <p>{home_goals_text}</p>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-                <h3 style='text-align: center;'>
-                    {match_details.iloc[0]['home_score']} - {match_details.iloc[0]['away_score']}
-                </h3>
-            """, unsafe_allow_html=True)
-
-            # Mostrar los goles en la tanda de penaltis solo si existen
-            if shootout_goals.shape[0] > 0:
+            # Resultado y goleadores: recorrer el partido una sola vez y filtrar después sobre tiros y goles en propia puerta
+            report_events = match_events[match_events["type"].isin(["Shot", "Own Goal Against"])]
+            goals = report_events[report_events["shot_outcome"] == "Goal"]  # Filtrar eventos de gol
+            own_goals = report_events[report_events["type"] == "Own Goal Against"] # Filtrar eventos de gol en propia puerta
+            missed_penalties = report_events[(report_events["shot_type"] == "Penalty")
+                                             & ((report_events["shot_outcome"].isin(["Saved", "Post"])))] # Filtrar penaltis fallados
+
+            # Filtrar goles por equipo
+            home_goals = goals[goals["team"] == home_team]
+            away_goals = goals[goals["team"] == away_team]
+
+            # Filtrar goles en propia puerta
+            home_own_goals = own_goals[own_goals["team"] == home_team]
+            away_own_goals = own_goals[own_goals["team"] == away_team]
+
+            # Filtrar penaltis fallados
+            home_missed_penalties = missed_penalties[missed_penalties["team"] == home_team]
+            away_missed_penalties = missed_penalties[missed_penalties["team"] == away_team]
+
+            # Filtrar goles en la tanda de penaltis
+            shootout_goals = goals[goals["period"] == 5]
+            home_shootout_goals = shootout_goals[shootout_goals["team"] == home_team].shape[0]
+            away_shootout_goals = shootout_goals[shootout_goals["team"] == away_team].shape[0]
+
+
+            col1, col2, col3, col4, col5, col6 = st.columns([1, 0.9, 0.4, 0.4, 0.8, 0.8])
+            with col1:
+                # Local
+                st.markdown(f"<h4 style='text-align: center;'>{home_team}</h4>", unsafe_allow_html=True)
+            
+            with col2:
+                st.image(f"img/{home_team}.jpg", width=80)
+                
+                # Construir texto para los goles del equipo local
+                home_goals_text = goals_text(home_goals, away_own_goals, home_missed_penalties)
+
+                # Consolidar todo en un único st.markdown
                 st.markdown(f"""
-                    <h4 style='text-align: center; color: gray;'>
-                        ({home_shootout_goals} - {away_shootout_goals})
-                    </h4>
+                    <div style="text-align: center;">
+                        <div style="margin-top: 30px;"></div>
+                        <div style="text-align: left;">
+                            <p>{home_goals_text}</p>
+                        </div>
+                    </div>
                 """, unsafe_allow_html=True)
-    
-        with col5:
-            st.image(f"img/{match_details.iloc[0]['away_team']}.jpg", width=80)
-
-            # Construir texto para los goles del equipo visitante
-            away_goals_text = ""
-            for _, goal in away_goals.iterrows():
-                player = goal["player"]
-                minute = goal["minute"] + 1 if goal["minute"] == 0 else goal["minute"] # Sumar 1 al minuto si fue en los primeros segundos
-                is_penalty = goal["shot_type"] == "Penalty"  # Verificar si el gol fue de penalti
-                penalty_marker = " (p)" if is_penalty else ""
-                away_goals_text += f"⚽ <b>{player}{penalty_marker}</b> - {minute}'<br>"
-
-            for _, own_goal in home_own_goals.iterrows():
-                player = own_goal["player"]
-                minute = own_goal["minute"] + 1 if own_goal["minute"] == 0 else own_goal["minute"]
-                away_goals_text += f"🛑 <b>{player}</b> (Own Goal) - {minute}'<br>"
-
-            for _, penalty in away_missed_penalties.iterrows():
-                player = penalty["player"]
-                minute = penalty["minute"] + 1 if penalty["minute"] == 0 else penalty["minute"] # Sumar 1 al minuto si fue en los primeros segundos
-                away_goals_text += f"❌ <b>{player}</b> (Missed Penalty) - {minute}'<br>"
             
-            # Consolidar todo en un único st.markdown
-            st.markdown(f"""
-                <div style="text-align: center;">
-                    <div style="margin-top: 30px;"></div>
-                    <div style="text-align: left;">
-                        <p>{away_goals_text}</p>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-
-        with col6:
-            # Visitante
-            st.markdown(f"<h4 style='text-align: left;'>{match_details.iloc[0]['away_team']}</h4>", unsafe_allow_html=True)
-
-        # Separador
-        st.divider()
-
-        st.write("🧍 Home coach: ", match_details.iloc[0]["home_managers"])
-        st.write("🧍 Away coach: ", match_details.iloc[0]["away_managers"])
-        formatted_date = pd.to_datetime(match_details.iloc[0]["match_date"]).strftime("%d/%m/%Y")
-        st.write("📅 Date: ", formatted_date)
-        st.write("📣 Referee: ", match_details.iloc[0]["referee"])
-        st.write("🏟️ Stadium: ", match_details.iloc[0]["stadium"])
+            with col3:
+                st.markdown(f"""
+                    <h3 style='text-align: center;'>
+                        {match_info['home_score']} - {match_info['away_score']}
+                    </h3>
+                """, unsafe_allow_html=True)
 
+                # Mostrar los goles en la tanda de penaltis solo si existen
+                if shootout_goals.shape[0] > 0:
+                    st.markdown(f"""
+                        <h4 style='text-align: center; color: gray;'>
+                            ({home_shootout_goals} - {away_shootout_goals})
+                        </h4>
+                    """, unsafe_allow_html=True)
+        
+            with col5:
+                st.image(f"img/{away_team}.jpg", width=80)
 
-    # Segunda pestaña
-    with data_tab:
-        # Cargar las alineaciones
-        lineups = load_lineups(selected_competition)
+                # Construir texto para los goles del equipo visitante
+                away_goals_text = goals_text(away_goals, home_own_goals, away_missed_penalties)
 
-        # Filtrar por el partido seleccionado usando match_id y quitar el índice
-        match_id = match_details["match_id"].values[0]
-        match_lineups = lineups[lineups["match_id"] == match_id]
+                # Consolidar todo en un único st.markdown
+                st.markdown(f"""
+                    <div style="text-align: center;">
+                        <div style="margin-top: 30px;"></div>
+                        <div style="text-align: left;">
+                            <p>{away_goals_text}</p>
+                        </div>
+                    </div>
+                """, unsafe_allow_html=True)
 
-        # Obtener los nombres de los equipos en el partido
-        home_team = match_details["home_team"].values[0]
-        away_team = match_details["away_team"].values[0]
+            with col6:
+                # Visitante
+                st.markdown(f"<h4 style='text-align: left;'>{away_team}</h4>", unsafe_allow_html=True)
 
-        # Separar las alineaciones por equipo
-        home_team_lineup = match_lineups[match_lineups["country"] == home_team].sort_values(by="jersey_number")
-        away_team_lineup = match_lineups[match_lineups["country"] == away_team].sort_values(by="jersey_number")
+            # Separador
+            st.divider()
 
-        # Jugadores que salieron de inicio
-        home_team_starting = home_team_lineup[
-            home_team_lineup["positions"].apply(lambda pos: any(d.get("from") == "00:00" for d in ast.literal_eval(pos)))].reset_index(drop=True)
+            st.write("🧍 Home coach: ", match_info["home_managers"])
+            st.write("🧍 Away coach: ", match_info["away_managers"])
+            formatted_date = pd.to_datetime(match_info["match_date"]).strftime("%d/%m/%Y")
+            st.write("📅 Date: ", formatted_date)
+            st.write("📣 Referee: ", match_info["referee"])
+            st.write("🏟️ Stadium: ", match_info["stadium"])
 
-        away_team_starting = away_team_lineup[
-            away_team_lineup["positions"].apply(lambda pos: any(d.get("from") == "00:00" for d in ast.literal_eval(pos)))].reset_index(drop=True)
 
-        # Jugadores restantes
-        home_team_subs = home_team_lineup[
-            home_team_lineup["positions"].apply(lambda pos: not any(d.get("from") == "00:00" for d in ast.literal_eval(pos)))].reset_index(drop=True)
+    # Segunda pestaña
+    if data_tab.open:
+        with data_tab:
+            # Jugadores que salieron de inicio
+            home_team_starting = home_team_lineup[home_team_lineup["is_starter"]].reset_index(drop=True)
+            away_team_starting = away_team_lineup[away_team_lineup["is_starter"]].reset_index(drop=True)
 
-        away_team_subs = away_team_lineup[
-            away_team_lineup["positions"].apply(lambda pos: not any(d.get("from") == "00:00" for d in ast.literal_eval(pos)))].reset_index(drop=True)
+            # Jugadores restantes
+            home_team_subs = home_team_lineup[~home_team_lineup["is_starter"]].reset_index(drop=True)
+            away_team_subs = away_team_lineup[~away_team_lineup["is_starter"]].reset_index(drop=True)
 
-        # Mostrar en columnas
-        col1, col2 = st.columns(2)
+            # Mostrar en columnas
+            col1, col2 = st.columns(2)
 
-        with col1:
-            st.write("")
-            st.markdown(f"<h4>{home_team} Starting XI</h4>", unsafe_allow_html=True)
-            df = home_team_starting[["jersey_number", "player_name"]]
-            st.dataframe(df.set_index("jersey_number"), use_container_width=True)
+            with col1:
+                st.write("")
+                st.markdown(f"<h4>{home_team} Starting XI</h4>", unsafe_allow_html=True)
+                df = home_team_starting[["jersey_number", "player_name"]]
+                st.dataframe(df.set_index("jersey_number"), use_container_width=True)
 
-            st.divider()
+                st.divider()
 
-            st.markdown("<h4>Substitutes</h4>", unsafe_allow_html=True)
-            df = home_team_subs[["jersey_number", "player_name"]]
-            st.dataframe(df.set_index("jersey_number"), use_container_width=True)
+                st.markdown("<h4>Substitutes</h4>", unsafe_allow_html=True)
+                df = home_team_subs[["jersey_number", "player_name"]]
+                st.dataframe(df.set_index("jersey_number"), use_container_width=True)
 
-        with col2:
-            st.write("")
-            st.markdown(f"<h4>{away_team} Starting XI</h4>", unsafe_allow_html=True)
-            df = away_team_starting[["jersey_number", "player_name"]]
-            st.dataframe(df.set_index("jersey_number"), use_container_width=True)
+            with col2:
+                st.write("")
+                st.markdown(f"<h4>{away_team} Starting XI</h4>", unsafe_allow_html=True)
+                df = away_team_starting[["jersey_number", "player_name"]]
+                st.dataframe(df.set_index("jersey_number"), use_container_width=True)
 
-            st.divider()
+                st.divider()
 
-            st.markdown("<h4>Substitutes</h4>", unsafe_allow_html=True)
-            df = away_team_subs[["jersey_number", "player_name"]]
-            st.dataframe(df.set_index("jersey_number"), use_container_width=True)
+                st.markdown("<h4>Substitutes</h4>", unsafe_allow_html=True)
+                df = away_team_subs[["jersey_number", "player_name"]]
+                st.dataframe(df.set_index("jersey_number"), use_container_width=True)
 
-    
+        
     # Tercera pestaña
-    with heatmap_tab:
+    if heatmap_tab.open:
+        with heatmap_tab:
 
-        with st.expander("ℹ️ Explanation of the heatmap"):
-                         
-            st.markdown("""
-            Numerical values on the colorbar represent the relative density of passes across different areas of the pitch, calculated using Kernel Density Estimation (KDE).
+            with st.expander("ℹ️ Explanation of the heatmap"):
+                             
+                st.markdown("""
+                Numerical values on the colorbar represent the relative density of passes across different areas of the pitch, calculated by counting the passes started in each zone and smoothing the result with a Gaussian filter.
 
-                Higher values → areas with a higher concentration of passes (more passes started in or near that zone).
+                    Higher values → areas with a higher concentration of passes (more passes started in or near that zone).
 
-                Lower values (closer to 0) → areas with low or no passing activity.
-            """)
-        
-        # Seleccionar equipo para el mapa de calor
-        selected_team_for_heatmap = st.radio("Select a team:", [home_team, away_team])
-        
-        col1, col2, col3 = st.columns([0.3, 0.9, 0.3])
-        with col2:
-            # Crear el mapa de calor
-            heatmap(selected_team_for_heatmap, match_id)
+                    Lower values (closer to 0) → areas with low or no passing activity.
+                """)
+            
+            # Seleccionar equipo para el mapa de calor
+            restore_selection("heatmap_team", [home_team, away_team])
+            selected_team_for_heatmap = st.radio("Select a team:", [home_team, away_team], key="heatmap_team")
+            save_selection("heatmap_team")
+            
+            col1, col2, col3 = st.columns([0.3, 0.9, 0.3])
+            with col2:
+                # Crear el mapa de calor
+                heatmap(selected_team_for_heatmap, match_id, match_events, match_event_rows)
 
 
     # Cuarta pestaña
-    with pass_map_tab:
+    if pass_map_tab.open:
+        with pass_map_tab:
+            # Jugadores que llegaron a jugar
+            home_team_played = home_team_lineup[home_team_lineup["played"]]
+            away_team_played = away_team_lineup[away_team_lineup["played"]]
 
-        home_team_played = home_team_lineup[
-            home_team_lineup["positions"].apply(lambda pos: len(ast.literal_eval(pos)) > 0)
-        ]
-        
-        away_team_played = away_team_lineup[
-            away_team_lineup["positions"].apply(lambda pos: len(ast.literal_eval(pos)) > 0)
-        ]
-
-        col1, col2 = st.columns(2)
+            col1, col2 = st.columns(2)
 
-        with col1:
-            local_player_selected = st.selectbox("Home team player", home_team_played["player_name"].tolist())
-            st.write("")
+            with col1:
+                home_players = home_team_played["player_name"].tolist()
+                restore_selection("home_player", home_players)
+                local_player_selected = st.selectbox("Home team player", home_players, key="home_player")
+                save_selection("home_player")
+                st.write("")
 
-            # Mostrar el mapa de pases del jugador local seleccionado
-            pass_map(local_player_selected, home_team_played["match_id"].iloc[0])
+                # Mostrar el mapa de pases del jugador local seleccionado
+                pass_map(local_player_selected, match_id, match_events, match_event_rows)
 
-        with col2:
-            away_player_selected = st.selectbox("Away team player", away_team_played["player_name"].tolist())
-            st.write("")
-            
-            # Mostrar el mapa de pases del jugador visitante seleccionado
-            pass_map(away_player_selected, away_team_played["match_id"].iloc[0])
+            with col2:
+                away_players = away_team_played["player_name"].tolist()
+                restore_selection("away_player", away_players)
+                away_player_selected = st.selectbox("Away team player", away_players, key="away_player")
+                save_selection("away_player")
+                st.write("")
+                
+                # Mostrar el mapa de pases del jugador visitante seleccionado
+                pass_map(away_player_selected, match_id, match_events, match_event_rows)
 
-        st.warning("⚠️ Throw-ins are not included in the pass maps.")
+            st.warning("⚠️ Throw-ins are not included in the pass maps.")
 
 
     # Quinta pestaña
-    with pass_network_tab:
-        with st.expander("ℹ️ Explanation of the pass network"):
-            st.markdown("The metric shows where the team makes their most passes, the players involved in those passes, "
-                        "and whom the player passes the most and the least. It indicates connections only among the starting players before the first substitution.")
+    if pass_network_tab.open:
+        with pass_network_tab:
+            with st.expander("ℹ️ Explanation of the pass network"):
+                st.markdown("The metric shows where the team makes their most passes, the players involved in those passes, "
+                            "and whom the player passes the most and the least. It indicates connections only among the starting players before the first substitution.")
 
-        selected_team = st.radio("Select a team:", [home_team, away_team], key="pass_network_team")
+            restore_selection("pass_network_team", [home_team, away_team])
+            selected_team = st.radio("Select a team:", [home_team, away_team], key="pass_network_team")
+            save_selection("pass_network_team")
 
-        col1, col2, col3 = st.columns([0.3, 0.9, 0.3])
+            col1, col2, col3 = st.columns([0.3, 0.9, 0.3])
 
-        with col2:
-            pass_network(selected_team, match_id)
-        
+            with col2:
+                pass_network(selected_team, match_id)
+            
 
     # Sexta pestaña
-    with shot_map_tab:
-        home_team_played = home_team_lineup[
-            home_team_lineup["positions"].apply(lambda pos: len(ast.literal_eval(pos)) > 0)
-        ]
+    if shot_map_tab.open:
+        with shot_map_tab:
+            # Explicación del xG
+            with st.expander("ℹ️ Explanation of the shot map"):
+                st.markdown("ℹ️ xG (Expected Goals) is a metric that estimates the quality of a shot based on various factors such as "
+                            "distance from goal, angle, and type of shot. A higher xG value indicates a better chance of scoring."
+                )
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.write("")
+                shot_map(home_team, match_id, match_events, match_event_rows)
         
-        away_team_played = away_team_lineup[
-            away_team_lineup["positions"].apply(lambda pos: len(ast.literal_eval(pos)) > 0)
-        ]
-
-        # Explicación del xG
-        with st.expander("ℹ️ Explanation of the shot map"):
-            st.markdown("ℹ️ xG (Expected Goals) is a metric that estimates the quality of a shot based on various factors such as "
-                        "distance from goal, angle, and type of shot. A higher xG value indicates a better chance of scoring."
-            )
-
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.write("")
-            shot_map(home_team, home_team_played["match_id"].iloc[0])
-    
-        with col2:
-            st.write("")
-            shot_map(away_team, away_team_played["match_id"].iloc[0])
+            with col2:
+                st.write("")
+                shot_map(away_team, match_id, match_events, match_event_rows)
 
-        st.warning("⚠️ Penalties are not included in the shot maps.")
+            st.warning("⚠️ Penalties are not included in the shot maps.")
 
     # st.divider()
     #with st.expander('ℹ️ Disclaimer & Info'):
@@ -1,6 +1,6 @@
 import os
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -21,8 +21,13 @@ files_and_tables = [
     ('data/euro_goalkeepers_stats.csv', 'euro_goalkeepers_stats'),
 ]
 
+# Tablas ya existentes (el script se puede volver a ejecutar sobre una base de datos ya poblada)
+existing_tables = set(inspect(engine).get_table_names())
+
 for file_path, table_name in files_and_tables:
-    if os.path.exists(file_path):
+    if table_name in existing_tables:
+        print(f"Table {table_name} already exists, skipping.")
+    elif os.path.exists(file_path):
         print(f"Uploading {file_path} to table {table_name}...")
         df = pd.read_csv(file_path)
         df.to_sql(table_name, engine, if_exists='fail', index=False)
@@ -30,4 +35,10 @@ for file_path, table_name in files_and_tables:
     else:
         print(f"File {file_path} not found.")
 
+# Índices para leer los eventos de un partido en orden sin recorrer toda la tabla
+# (también se crean en bases de datos ya pobladas)
+with engine.begin() as connection:
+    for table_name in ('euro_all_events', 'copa_america_all_events'):
+        connection.execute(text(f'CREATE INDEX IF NOT EXISTS {table_name}_match_id_idx ON {table_name} (match_id, "index")'))
+
 print("Database population complete.")
\ No newline at end of file